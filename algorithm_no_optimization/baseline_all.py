@@ -0,0 +1,29 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path('..')))
+from carbon_shift.baseline import BaselineAccounting, load_carbon_intensity, load_power_traces
+
+# Define variables to control the generation of CSV files
+generate_csv = False
+
+# Read every PDU trace and the actual carbon intensity of every region
+power_df = load_power_traces(Path('..') / 'data_powerTrace')
+ci_df = load_carbon_intensity(Path('..') / 'data_SPC24', alpha=0.1, column='actual')
+
+# Compute the baseline emissions of all PDU x region pairs at once
+start_time = time.perf_counter()
+accounting = BaselineAccounting(power_df, ci_df)
+elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+baseline_df = accounting.table()
+print(baseline_df.to_string(index=False))
+print(f"{len(accounting.pdus)} PDUs x {len(accounting.regions)} regions over {len(accounting.hours)} hours "
+      f"in {elapsed_ms:.1f} ms")
+
+# Save the totals and the per-day / per-hour-of-day rollups
+if generate_csv:
+    baseline_df.to_csv('baseline_emissions.csv', index=False)
+    accounting.daily_table().to_csv('baseline_emissions_daily.csv', index=False)
+    accounting.hour_of_day_table().to_csv('baseline_emissions_hour_of_day.csv', index=False)
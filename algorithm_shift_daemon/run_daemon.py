@@ -0,0 +1,77 @@
+import sys
+import json
+import asyncio
+import pandas as pd
+from pathlib import Path
+
+sys.path.append(str(Path('..')))
+from carbon_shift.daemon import ReplayFeedServer, ShiftDaemon, TcpFeed
+
+# Define dataset and paths
+ciso_name = 'CISO'  # Define the name of the CISO dataset
+pdu_names = ['cella_pdu6', 'cella_pdu7', 'cella_pdu8']
+ci_data_path = Path('..') / 'data_SPC24' / f'SPCI-{ciso_name}' / f'{ciso_name}_direct_24hr_CI_forecasts_spci__alpha_0.1.csv'
+
+# Scheduler settings
+shift_window = 12  # Hours (including the current one) to look ahead
+power_multiplier = 3  # Per-PDU peak power limit as a multiple of the average power utilization
+replay_interval = 0.0  # Seconds between forecast rows streamed by the replay server
+
+# Read the CI data (for scoring) and the power traces of the simulated PDU clients
+ci_data_df = pd.read_csv(ci_data_path, parse_dates=['datetime'])
+power_traces = {
+    pdu: pd.read_csv(Path('..') / 'data_powerTrace' / f'{pdu}_converted.csv', parse_dates=['hour'])
+    for pdu in pdu_names
+}
+average_power_utilization = pd.concat(power_traces.values())['measured_power_util'].mean()
+max_peak_power = power_multiplier * average_power_utilization
+
+
+async def pdu_client(host, port, pdu, trace_df):
+    # One connection per PDU; every hour of its trace is one placement request
+    reader, writer = await asyncio.open_connection(host, port)
+    placements = []
+    for hour, load in zip(trace_df['hour'], trace_df['measured_power_util']):
+        writer.write((json.dumps({'pdu': pdu, 'hour': hour.isoformat(), 'load': load}) + '\n').encode())
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        placements.append((hour, pd.Timestamp(response['dest_hour']), load))
+    writer.close()
+    return pd.DataFrame(placements, columns=['hour', 'dest_hour', 'load'])
+
+
+async def main():
+    # Start the local stand-in for the forecast provider
+    feed_server = ReplayFeedServer(ci_data_path, interval=replay_interval)
+    feed_host, feed_port = await feed_server.start()
+
+    async with ShiftDaemon(TcpFeed(feed_host, feed_port), shift_window=shift_window,
+                           max_peak_power=max_peak_power) as daemon:
+        # Wait until the whole forecast file has been replayed
+        await daemon.wait_for_forecasts(len(ci_data_df))
+
+        server = await daemon.serve()
+        host, port = server.sockets[0].getsockname()[:2]
+
+        # All PDU clients query the daemon concurrently
+        results = await asyncio.gather(*(pdu_client(host, port, pdu, power_traces[pdu]) for pdu in pdu_names))
+
+        server.close()
+        await server.wait_closed()
+        stats = daemon.stats()
+
+    await feed_server.close()
+
+    # Compare emissions of the placements with the unshifted baseline
+    actual = ci_data_df.set_index('datetime')['actual']
+    for pdu, placements in zip(pdu_names, results):
+        placements = placements[placements['hour'].isin(actual.index)]
+        baseline = (placements['load'] * actual.loc[placements['hour']].to_numpy()).sum()
+        shifted = (placements['load'] * actual.loc[placements['dest_hour']].to_numpy()).sum()
+        print(f"{pdu}: baseline {baseline:.2f} gCO2, shifted {shifted:.2f} gCO2")
+
+    for name, value in stats.items():
+        print(f"{name}: {value}")
+
+
+asyncio.run(main())
@@ -1,7 +1,11 @@
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+sys.path.append(str(Path('..')))
+from carbon_shift import temporal_shift_moves, score_moves
+
 # Read the CSV files with proper datetime parsing
 ciso_name = 'ISNE'  # Define the name of the CISO dataset
 power_trace_path = Path('..') / 'data_powerTrace' / 'cella_pdu6_converted.csv'
@@ -18,8 +22,10 @@ power_trace_df.rename(columns={'hour': 'datetime'}, inplace=True)
 # Merge the two DataFrames on 'datetime'
 merged_df = pd.merge(power_trace_df, ci_data, on='datetime')
 
-# Total number of data points
-num_rows = len(merged_df)
+# Extract the columns used by the scheduler once, without copying per shift window
+power = merged_df['measured_power_util'].to_numpy()
+forecast = merged_df['predicted'].to_numpy()
+actual = merged_df['actual'].to_numpy()
 
 # Initialize lists to store results
 shift_windows = list(range(0, 25))  # From 0 to 24 inclusive
@@ -27,34 +33,12 @@ total_carbon_emissions_list = []
 peak_power_utilization_list = []
 
 for shift_window in shift_windows:
-    # Create a copy of the merged DataFrame to avoid modifying the original data
-    merged_df_copy = merged_df.copy()
-    
-    if shift_window == 0:
-        # No optimization; use original measured power utilization
-        merged_df_copy['shifted_power_util'] = merged_df_copy['measured_power_util']
-    else:
-        # Initialize shifted_power_util to zeros
-        merged_df_copy['shifted_power_util'] = 0.0
-
-        # Iterate over each time point
-        for i in range(num_rows):
-            # Determine the window of future hours to consider
-            end_idx = min(i + shift_window + 1, num_rows)  # +1 to include the current time
-            forecast_window = merged_df_copy.iloc[i:end_idx]
-
-            # Find the index with the minimum forecasted carbon intensity
-            idx_min = forecast_window['predicted'].idxmin()
-
-            # Shift the power utilization to the time with minimum forecasted carbon intensity
-            merged_df_copy.at[idx_min, 'shifted_power_util'] += merged_df_copy.at[i, 'measured_power_util']
-
-    # Calculate the emissions
-    merged_df_copy['emissions'] = merged_df_copy['shifted_power_util'] * merged_df_copy['actual']
+    # Compute the sparse move list; the window includes the current hour plus shift_window future hours
+    moves = temporal_shift_moves(power, forecast, shift_window + 1 if shift_window > 0 else 0)
 
     # Calculate peak power utilization and total carbon emissions
-    peak_power_utilization = merged_df_copy['shifted_power_util'].max()
-    total_carbon_emissions = merged_df_copy['emissions'].sum()
+    peak_power_utilization = moves.peak()
+    total_carbon_emissions = score_moves(moves, actual)
 
     # Append the results to the lists
     peak_power_utilization_list.append(peak_power_utilization)
@@ -1,7 +1,11 @@
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+sys.path.append(str(Path('..')))
+from carbon_shift import temporal_shift_power_cap_moves, score_moves
+
 # Read the data
 # Define dataset and paths
 ciso_name = 'ISNE'  # Define the name of the CISO dataset
@@ -25,70 +29,30 @@ merged_df = pd.merge(power_trace_df, ci_data_df, on='datetime')
 # Calculate the average power utilization without optimization
 average_power_utilization = merged_df['measured_power_util'].mean()
 
+# Extract the columns used by the scheduler once, without copying per sweep point
+power = merged_df['measured_power_util'].to_numpy()
+forecast = merged_df['avg_carbon_intensity_forecast'].to_numpy()
+actual = merged_df['carbon_intensity_actual'].to_numpy()
+
 # Initialize a list to hold the results
 results = []
 
 # Loop over shift windows and power multipliers
 for shift_window in range(25):  # 0 to 24 inclusive
     for power_multiplier in [1, 2, 5, 10, 100]:
-        # Copy the merged_df to a new DataFrame to avoid modifying the original data
-        df = merged_df.copy()
-        
         # Define the max peak power as a multiple of the average power utilization
         max_peak_power = power_multiplier * average_power_utilization
 
-        # Check if shift_window is 0 to skip optimization
-        if shift_window == 0:
-            # No optimization; use original measured power utilization
-            df['shifted_power_util'] = df['measured_power_util']
-        else:
-            # Initialize shifted_power_util to zeros
-            df['shifted_power_util'] = 0.0
-
-            # Total number of data points
-            num_rows = len(df)
-
-            # Iterate over each time point
-            for i in range(num_rows):
-                # Determine the window of future hours to consider
-                end_idx = min(i + shift_window, num_rows)
-
-                # Extract the forecasted carbon intensities in the window
-                forecast_window = df.iloc[i:end_idx].copy()
-
-                # Sort the window by carbon intensity forecast, lowest first
-                sorted_window = forecast_window.sort_values(by='avg_carbon_intensity_forecast')
-
-                # Initialize a flag to check if workload has been shifted
-                shifted = False
-
-                # Find a suitable time within the window that doesn't exceed max_peak_power
-                for idx in sorted_window.index:
-                    # Calculate potential new power utilization
-                    potential_power_util = df.at[idx, 'shifted_power_util'] + df.at[i, 'measured_power_util']
-
-                    # Check if this shift would exceed max_peak_power
-                    if potential_power_util <= max_peak_power:
-                        # If within limit, shift the power utilization to this time slot
-                        df.at[idx, 'shifted_power_util'] = potential_power_util
-                        shifted = True
-                        break
-
-                # If no suitable time was found, keep the workload at its original time
-                if not shifted:
-                    df.at[i, 'shifted_power_util'] += df.at[i, 'measured_power_util']
-
-            # Verify that total power utilization remains the same
-            total_measured_power = df['measured_power_util'].sum()
-            total_shifted_power = df['shifted_power_util'].sum()
-            assert abs(total_measured_power - total_shifted_power) < 1e-6, "Total power utilization mismatch!"
+        # Compute the sparse move list instead of a full shifted_power_util column
+        moves = temporal_shift_power_cap_moves(power, forecast, shift_window, max_peak_power)
 
-        # Calculate the emissions
-        df['emissions'] = df['shifted_power_util'] * df['carbon_intensity_actual']
+        # Verify that total power utilization remains the same
+        shifted_power = moves.shifted_load()
+        assert abs(power.sum() - shifted_power.sum()) < 1e-6, "Total power utilization mismatch!"
 
         # Calculate peak power utilization and total carbon emissions
-        peak_power_utilization = df['shifted_power_util'].max()
-        total_carbon_emissions = df['emissions'].sum()
+        peak_power_utilization = shifted_power.max()
+        total_carbon_emissions = score_moves(moves, actual)
 
         # Append results to the list
         results.append({
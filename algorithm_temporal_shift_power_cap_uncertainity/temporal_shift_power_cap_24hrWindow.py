@@ -1,15 +1,20 @@
-import pandas as pd
+import sys
+import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 
+sys.path.append(str(Path('..')))
+from carbon_shift import TimeSeries, temporal_shift_power_cap_moves, score_moves
+from carbon_shift.export import SweepExporter
+
 # Control variables
-generate_text = False
 generate_image = False
-generate_csv = False  # Set to False to avoid generating multiple CSV files
+export_results = False  # Write every sweep point to the partitioned Parquet dataset in sweep_results/
 
 # Define dataset and paths
 ciso_name = 'ERCO'  # Define the name of the CISO dataset
-power_trace_path = Path('..') / 'data_powerTrace' / 'cella_pdu6_converted.csv'
+pdu_name = 'cella_pdu6'
+power_trace_path = Path('..') / 'data_powerTrace' / f'{pdu_name}_converted.csv'
 
 plt.rcParams.update({'font.size': 20})
 
@@ -21,21 +26,22 @@ ci_data_paths = {
     for alpha in alpha_levels
 }
 
-# Read the power trace CSV file with proper datetime parsing
-power_trace_df = pd.read_csv(power_trace_path, parse_dates=['hour'])
-
-# Rename the 'hour' column to 'datetime' for consistency
-power_trace_df.rename(columns={'hour': 'datetime'}, inplace=True)
+# Read the power trace and each CI file once, keeping only the needed columns as float32 arrays
+power_trace = TimeSeries.from_csv(power_trace_path, time_column='hour', columns=['measured_power_util'])
+ci_data = {
+    alpha: TimeSeries.from_csv(ci_data_paths[alpha], columns=['actual', 'predicted', 'lower bound', 'upper bound'])
+    for alpha in alpha_levels
+}
 
-# Read one of the CI data files to get the predicted carbon intensity
+# Align the power trace with the CI data (views over the common hours, no copies)
 # Since the predicted values are the same, we can use any alpha level
-ci_data_sample = pd.read_csv(ci_data_paths[0.1], parse_dates=['datetime'])
-ci_data_sample.rename(columns={'actual': 'carbon_intensity_actual',
-                               'predicted': 'avg_carbon_intensity_predicted'}, inplace=True)
+merged = power_trace.join(ci_data[0.1].select('actual', 'predicted'))
 
-# Merge the power trace data with the sample CI data
-merged_df = pd.merge(power_trace_df, ci_data_sample[['datetime', 'carbon_intensity_actual',
-                                                     'avg_carbon_intensity_predicted']], on='datetime')
+# Calculate the midpoint of the confidence interval for each alpha level on the same hours
+ci_midpoint_forecasts = {}
+for alpha in alpha_levels:
+    ci_window = ci_data[alpha].between(merged.start, merged.end)
+    ci_midpoint_forecasts[alpha] = (ci_window['lower bound'] + ci_window['upper bound']) / 2
 
 # Initialize lists to store results
 shift_windows = list(range(0, 25))  # Shift windows from 0 to 24 inclusive
@@ -47,7 +53,7 @@ total_emissions_alpha = {alpha: [] for alpha in alpha_levels}
 total_emissions_predicted = []
 
 # Calculate the average power utilization without optimization
-average_power_utilization = merged_df['measured_power_util'].mean()
+average_power_utilization = merged['measured_power_util'].mean(dtype=np.float64)
 
 # Define the max peak power as a multiple of the average power utilization
 # Since you want only one parameter, we'll fix the power multiplier at 1
@@ -55,96 +61,73 @@ power_multiplier = 3
 max_peak_power = power_multiplier * average_power_utilization
 
 # Function to perform workload shifting
-def perform_shifting(df, forecast_column, shift_window):
-    df = df.copy()
-    if shift_window == 0:
-        # No optimization; use original measured power utilization
-        df['shifted_power_util'] = df['measured_power_util']
-    else:
-        # Initialize shifted_power_util to zeros
-        df['shifted_power_util'] = 0.0
-    
-        # Total number of data points
-        num_rows = len(df)
-    
-        # Iterate over each time point
-        for i in range(num_rows):
-            # Determine the window of future hours to consider
-            end_idx = min(i + shift_window, num_rows)
-    
-            # Extract the forecasted carbon intensities in the window
-            forecast_window = df.iloc[i:end_idx].copy()
-    
-            # Use the specified forecast column for sorting
-            forecast_window['forecast_for_sorting'] = forecast_window[forecast_column]
-    
-            # Sort the window by the forecasted carbon intensity, lowest first
-            sorted_window = forecast_window.sort_values(by='forecast_for_sorting')
-    
-            # Initialize a flag to check if workload has been shifted
-            shifted = False
-    
-            # Find a suitable time within the window that doesn't exceed max_peak_power
-            for idx in sorted_window.index:
-                # Calculate potential new power utilization
-                potential_power_util = df.at[idx, 'shifted_power_util'] + df.at[i, 'measured_power_util']
-    
-                # Check if this shift would exceed max_peak_power
-                if potential_power_util <= max_peak_power:
-                    # If within limit, shift the power utilization to this time slot
-                    df.at[idx, 'shifted_power_util'] = potential_power_util
-                    shifted = True
-                    break
-    
-            # If no suitable time was found, keep the workload at its original time
-            if not shifted:
-                df.at[i, 'shifted_power_util'] += df.at[i, 'measured_power_util']
-    
-        # Verify that total power utilization remains the same
-        total_measured_power = df['measured_power_util'].sum()
-        total_shifted_power = df['shifted_power_util'].sum()
-        assert abs(total_measured_power - total_shifted_power) < 1e-6, "Total power utilization mismatch!"
-    
-    # Calculate the emissions using shifted power utilization and actual carbon intensity
-    df['emissions'] = df['shifted_power_util'] * df['carbon_intensity_actual']
-    
-    # Calculate total carbon emissions
-    total_carbon_emissions = df['emissions'].sum()
-    
-    return total_carbon_emissions, df
+def perform_shifting(forecast, shift_window):
+    moves = temporal_shift_power_cap_moves(merged, forecast, shift_window, max_peak_power)
+
+    # Verify that total power utilization remains the same
+    total_measured_power = merged['measured_power_util'].sum(dtype=np.float64)
+    total_shifted_power = moves.shifted_load().sum()
+    assert abs(total_measured_power - total_shifted_power) < 1e-6, "Total power utilization mismatch!"
+
+    # Calculate total carbon emissions using the actual carbon intensity
+    total_carbon_emissions = score_moves(moves, merged)
+
+    return total_carbon_emissions, moves
+
+# Per-hour columns of a run for export (views of the input plus the shifted load)
+def shifted_columns(moves, forecast):
+    shifted_power_util = moves.shifted_load()
+    return {
+        'datetime': merged.datetimes(),
+        'measured_power_util': merged['measured_power_util'],
+        'carbon_intensity_actual': merged['actual'],
+        'avg_carbon_intensity_predicted': merged['predicted'],
+        'ci_midpoint_forecast': forecast,
+        'shifted_power_util': shifted_power_util,
+        'emissions': shifted_power_util * merged['actual'],
+    }
+
+# Optional: write results on a background thread instead of per-point CSV/text files,
+# replacing the partitions of earlier runs of the same sweep points
+exporter = SweepExporter('sweep_results', overwrite=True) if export_results else None
 
 # Loop over shift windows
 for shift_window in shift_windows:
     # First, perform shifting using predicted carbon intensity (independent of CI)
-    emissions_predicted, df_predicted = perform_shifting(merged_df, 'avg_carbon_intensity_predicted', shift_window)
+    emissions_predicted, moves_predicted = perform_shifting('predicted', shift_window)
     total_emissions_predicted.append(emissions_predicted)
-    
+
+    # Optional: Export the predicted-only run (no alpha level applies)
+    if exporter is not None:
+        exporter.write(
+            {'region': ciso_name, 'pdu': pdu_name, 'algorithm': 'power_cap_predicted',
+             'alpha': None, 'window': shift_window},
+            shifted_columns(moves_predicted, merged['predicted']),
+            summary={'max_peak_power': max_peak_power,
+                     'peak_power_utilization': moves_predicted.peak(),
+                     'total_carbon_emissions': emissions_predicted},
+        )
+
     # Loop over alpha levels
     for alpha in alpha_levels:
-        # Read the CI data file for the current alpha level
-        ci_data_df = pd.read_csv(ci_data_paths[alpha], parse_dates=['datetime'])
-        
-        # Calculate the midpoint of the confidence interval for this alpha level
-        ci_data_df['ci_midpoint_forecast'] = (ci_data_df['lower bound'] + ci_data_df['upper bound']) / 2
-        
-        # Merge the CI data with the merged_df
-        df = merged_df.copy()
-        df = df.merge(ci_data_df[['datetime', 'ci_midpoint_forecast']], on='datetime')
-        
-        # Perform workload shifting using ci_midpoint_forecast
-        emissions, df_shifted = perform_shifting(df, 'ci_midpoint_forecast', shift_window)
+        # Perform workload shifting using the confidence interval midpoint
+        emissions, moves = perform_shifting(ci_midpoint_forecasts[alpha], shift_window)
         total_emissions_alpha[alpha].append(emissions)
-        
-        # Optional: Generate CSV files for each shift window and alpha level
-        if generate_csv:
-            df_shifted.to_csv(f'full_data_shift_{shift_window}_peak_{max_peak_power:.2f}_alpha_{alpha}.csv', index=False)
-        
-        # Optional: Generate text reports
-        if generate_text:
-            with open(f'analysis_shift_{shift_window}_peak_{max_peak_power:.2f}_alpha_{alpha}.txt', 'w') as f:
-                f.write(f"Shift Window: {shift_window} hours (Alpha Level: {alpha})\n")
-                f.write(f"Max Peak Power Limit: {max_peak_power:.2f} kWh\n")
-                f.write(f"Total Carbon Emissions: {emissions:.2f} gCO2\n")
+
+        # Optional: Export the per-hour data and summary of this shift window and alpha level
+        if exporter is not None:
+            exporter.write(
+                {'region': ciso_name, 'pdu': pdu_name, 'algorithm': 'power_cap_ci_midpoint',
+                 'alpha': alpha, 'window': shift_window},
+                shifted_columns(moves, ci_midpoint_forecasts[alpha]),
+                summary={'max_peak_power': max_peak_power,
+                         'peak_power_utilization': moves.peak(),
+                         'total_carbon_emissions': emissions},
+            )
+
+# Wait for the background writer to flush
+if exporter is not None:
+    exporter.close()
 
 # Plot total emissions vs. shift window for all alpha levels and the predicted-only case
 plt.figure(figsize=(15,10))
@@ -0,0 +1,23 @@
+"""
+Shared scheduling and scoring code for the temporal shift experiments.
+
+The algorithm_* scripts run from their own directories, so they add the
+repository root to sys.path before importing this package.
+"""
+
+from .series import TimeSeries
+from .schedule import (
+    ScheduleMoves,
+    temporal_shift_moves,
+    temporal_shift_power_cap_moves,
+    score_moves,
+)
+from .chunked import (
+    ChunkedShiftScheduler,
+    iter_aligned_chunks,
+    write_aligned_store,
+    run_chunked,
+)
+from .placement import splittable_shift_moves
+from .rescore import SweepStore
+from .baseline import BaselineAccounting
@@ -0,0 +1,168 @@
+"""
+Batched no-optimization emissions accounting for every PDU x region pair.
+
+algorithm_no_optimization.py merges one power trace with one region's carbon
+intensity and multiplies them. BaselineAccounting builds the (pdu x hour) power
+matrix and the (region x hour) carbon intensity matrix once and gets the
+baseline of every pair from matrix products:
+    - totals: (pdu x region) = P @ C.T
+    - per day and per hour of day: both matrices are laid out on a
+      (day x hour-of-day) grid and contracted with one batched einsum.
+
+The result is a small long-form table that serves as the reference for any
+scheduler run (shifted emissions / baseline emissions).
+
+Usage:
+    power_df = load_power_traces(Path('..') / 'data_powerTrace')
+    ci_df = load_carbon_intensity(Path('..') / 'data_SPC24', alpha=0.1)
+    accounting = BaselineAccounting(power_df, ci_df)
+    print(accounting.table())
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .forecast_quality import spci_path
+
+
+def load_power_traces(data_dir, pdus=None):
+    """
+    Read the hourly power traces into one wide DataFrame.
+
+    Parameters:
+    - data_dir: str or Path, the data_powerTrace directory.
+    - pdus: list of str, optional (default: every *_converted.csv file).
+
+    Returns:
+    - pd.DataFrame indexed by hour with one 'measured_power_util' column per PDU.
+      Hours missing from a trace are NaN.
+    """
+    data_dir = Path(data_dir)
+    if pdus is None:
+        pdus = sorted(p.name[:-len('_converted.csv')] for p in data_dir.glob('*_converted.csv'))
+    series = {
+        pdu: pd.read_csv(data_dir / f'{pdu}_converted.csv', parse_dates=['hour'])
+               .set_index('hour')['measured_power_util']
+        for pdu in pdus
+    }
+    return pd.DataFrame(series).sort_index()
+
+
+def load_carbon_intensity(data_dir, regions=None, alpha=0.1, column='actual'):
+    """
+    Read one carbon intensity column of every region into one wide DataFrame.
+
+    Parameters:
+    - data_dir: str or Path, the data_SPC24 directory.
+    - regions: list of str, optional (default: every SPCI-* subdirectory).
+    - alpha: float, which SPCI file to read (the actual values are the same in all).
+    - column: str, e.g. 'actual' or 'predicted'.
+
+    Returns:
+    - pd.DataFrame indexed by datetime with one column per region.
+    """
+    data_dir = Path(data_dir)
+    if regions is None:
+        regions = sorted(p.name[len('SPCI-'):] for p in data_dir.glob('SPCI-*') if p.is_dir())
+    series = {
+        region: pd.read_csv(spci_path(data_dir, region, alpha), usecols=['datetime', column],
+                            parse_dates=['datetime']).set_index('datetime')[column]
+        for region in regions
+    }
+    return pd.DataFrame(series).sort_index()
+
+
+class BaselineAccounting:
+    """
+    Baseline (unshifted) emissions of every PDU x region pair.
+
+    Only hours present in both inputs are counted, like the inner merge of the
+    scripts. Missing power values count as zero load.
+
+    Parameters:
+    - power_df: pd.DataFrame indexed by (hourly) timestamps, one column per PDU.
+    - ci_df: pd.DataFrame indexed by hour, one carbon intensity column per region.
+    - dtype: numpy dtype of the matrices.
+    """
+
+    def __init__(self, power_df, ci_df, dtype=np.float64):
+        hours = power_df.index.intersection(ci_df.index).sort_values()
+        if (hours != hours.floor('h')).any():
+            raise ValueError("BaselineAccounting expects hourly data")
+        ci_df = ci_df.loc[hours]
+        if ci_df.isna().any().any():
+            raise ValueError("Carbon intensity has missing values on the common hours")
+
+        self.pdus = list(power_df.columns)
+        self.regions = list(ci_df.columns)
+        self.hours = hours
+
+        # (pdu x hour) and (region x hour) matrices
+        self.power = power_df.loc[hours].fillna(0.0).to_numpy(dtype=dtype).T
+        self.carbon_intensity = ci_df.to_numpy(dtype=dtype).T
+
+        # Lay the hours out on a (day x hour-of-day) grid for the rollups
+        days = hours.normalize()
+        self.days = days.unique()
+        day_index = self.days.get_indexer(days)
+        power_grid = np.zeros((len(self.pdus), len(self.days), 24), dtype=dtype)
+        ci_grid = np.zeros((len(self.regions), len(self.days), 24), dtype=dtype)
+        power_grid[:, day_index, hours.hour] = self.power
+        ci_grid[:, day_index, hours.hour] = self.carbon_intensity
+
+        self.totals = self.power @ self.carbon_intensity.T
+        self.daily = np.einsum('pdh,rdh->prd', power_grid, ci_grid, optimize=True)
+        self.hour_of_day = np.einsum('pdh,rdh->prh', power_grid, ci_grid, optimize=True)
+
+    def emissions(self, pdu, region):
+        """Baseline total emissions of one PDU in one region."""
+        return self.totals[self.pdus.index(pdu), self.regions.index(region)]
+
+    def table(self):
+        """
+        Totals of every PDU x region pair.
+
+        Returns:
+        - pd.DataFrame with pdu, region, total_power_util and total_carbon_emissions.
+        """
+        pdus, regions = np.meshgrid(np.arange(len(self.pdus)), np.arange(len(self.regions)), indexing='ij')
+        return pd.DataFrame({
+            'pdu': pd.Categorical.from_codes(pdus.ravel(), self.pdus),
+            'region': pd.Categorical.from_codes(regions.ravel(), self.regions),
+            'total_power_util': np.repeat(self.power.sum(axis=1), len(self.regions)),
+            'total_carbon_emissions': self.totals.ravel(),
+        })
+
+    def daily_table(self):
+        """
+        Emissions of every PDU x region pair per day.
+
+        Returns:
+        - pd.DataFrame with pdu, region, date and carbon_emissions.
+        """
+        pdus, regions, days = np.meshgrid(np.arange(len(self.pdus)), np.arange(len(self.regions)),
+                                          np.arange(len(self.days)), indexing='ij')
+        return pd.DataFrame({
+            'pdu': pd.Categorical.from_codes(pdus.ravel(), self.pdus),
+            'region': pd.Categorical.from_codes(regions.ravel(), self.regions),
+            'date': self.days[days.ravel()],
+            'carbon_emissions': self.daily.ravel(),
+        })
+
+    def hour_of_day_table(self):
+        """
+        Emissions of every PDU x region pair per hour of day, summed over all days.
+
+        Returns:
+        - pd.DataFrame with pdu, region, hour and carbon_emissions.
+        """
+        pdus, regions, hours = np.meshgrid(np.arange(len(self.pdus)), np.arange(len(self.regions)),
+                                           np.arange(24), indexing='ij')
+        return pd.DataFrame({
+            'pdu': pd.Categorical.from_codes(pdus.ravel(), self.pdus),
+            'region': pd.Categorical.from_codes(regions.ravel(), self.regions),
+            'hour': hours.ravel(),
+            'carbon_emissions': self.hour_of_day.ravel(),
+        })
@@ -0,0 +1,224 @@
+"""
+Out-of-core temporal shift scheduling over fixed-size chunks.
+
+The in-memory schedulers index the whole merged DataFrame with global
+positions. For multi-year 5-minute traces this does not fit on the worker
+nodes, so ChunkedShiftScheduler consumes the aligned power/CI data one chunk at
+a time and only carries the rows whose shift window is still open (at most
+shift_window - 1 rows) together with the load already placed on them.
+
+A row's placement only depends on rows i .. i + shift_window - 1, and a slot can
+only receive load from earlier rows, so a row is final as soon as it has been
+placed. The schedule is therefore identical to the in-memory run.
+
+Usage:
+    scheduler = ChunkedShiftScheduler(shift_window=12, max_peak_power=cap)
+    for chunk in iter_aligned_chunks('aligned.parquet', chunk_rows=100_000):
+        finalized = scheduler.process(chunk)
+        if finalized is not None:
+            ...  # write finalized rows out
+    finalized = scheduler.finish()
+    print(scheduler.total_carbon_emissions, scheduler.peak_power_utilization)
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .schedule import _place_power_cap, _window_argmin
+from .series import TimeSeries
+
+
+class ChunkedShiftScheduler:
+    """
+    Streaming version of temporal_shift_moves / temporal_shift_power_cap_moves.
+
+    Parameters:
+    - shift_window: int, number of hours (including the current one) to look ahead.
+    - max_peak_power: float, optional, peak power limit. None runs the uncapped shift.
+    - power_column, forecast_column, actual_column: str, column names in the chunks.
+    - time_column: str, timestamp column carried through to the output.
+    """
+
+    def __init__(self, shift_window, max_peak_power=None, power_column='measured_power_util',
+                 forecast_column='predicted', actual_column='actual', time_column='datetime'):
+        self.shift_window = shift_window
+        self.max_peak_power = max_peak_power
+        self.power_column = power_column
+        self.forecast_column = forecast_column
+        self.actual_column = actual_column
+        self.time_column = time_column
+
+        # Carry-over state: rows not yet placed and the load already placed on them
+        self._time = np.empty(0, dtype='datetime64[ns]')
+        self._power = np.empty(0)
+        self._forecast = np.empty(0)
+        self._actual = np.empty(0)
+        self._shifted = np.empty(0)
+
+        # Running totals over finalized rows
+        self.num_rows = 0
+        self.total_measured_power = 0.0
+        self.total_shifted_power = 0.0
+        self.total_carbon_emissions = 0.0
+        self.peak_power_utilization = -np.inf
+        self._finished = False
+
+    def process(self, chunk):
+        """
+        Add a chunk of aligned rows and place the rows that became final.
+
+        Parameters:
+        - chunk: pd.DataFrame or TimeSeries with the power, forecast and actual columns.
+
+        Returns:
+        - pd.DataFrame of finalized rows with 'shifted_power_util' and 'emissions',
+          or None if no row is final yet.
+        """
+        if self._finished:
+            raise RuntimeError("process() called after finish()")
+
+        if isinstance(chunk, TimeSeries):
+            times = chunk.datetimes()
+            power, forecast, actual = chunk[self.power_column], chunk[self.forecast_column], chunk[self.actual_column]
+        else:
+            times = chunk[self.time_column].to_numpy(dtype='datetime64[ns]')
+            power = chunk[self.power_column].to_numpy()
+            forecast = chunk[self.forecast_column].to_numpy()
+            actual = chunk[self.actual_column].to_numpy()
+
+        self._time = np.concatenate([self._time, times])
+        self._power = np.concatenate([self._power, power])
+        self._forecast = np.concatenate([self._forecast, forecast])
+        self._actual = np.concatenate([self._actual, actual])
+        self._shifted = np.concatenate([self._shifted, np.zeros(len(chunk))])
+
+        # Only rows whose whole window has arrived can be placed
+        ready = max(len(self._power) - max(self.shift_window, 1) + 1, 0)
+        return self._place(ready) if ready else None
+
+    def finish(self):
+        """
+        Place the remaining rows, clipping their windows at the end of the data.
+
+        Returns:
+        - pd.DataFrame of the last finalized rows, or None if there are none.
+        """
+        if self._finished:
+            return None
+        self._finished = True
+        return self._place(len(self._power)) if len(self._power) else None
+
+    def _place(self, ready):
+        power = self._power
+        shifted = self._shifted
+
+        if self.shift_window == 0:
+            shifted[:ready] += power[:ready]
+        elif self.max_peak_power is None:
+            # Accumulate row by row in order so sums match the in-memory run exactly
+            dst = _window_argmin(self._forecast, self.shift_window, ready)
+            np.add.at(shifted, dst, power[:ready])
+        else:
+            dst = np.arange(ready)
+            _place_power_cap(power, self._forecast, shifted, dst, 0, ready,
+                             self.shift_window, self.max_peak_power)
+
+        finalized = pd.DataFrame({
+            self.time_column: self._time[:ready],
+            self.power_column: power[:ready],
+            self.actual_column: self._actual[:ready],
+            'shifted_power_util': shifted[:ready],
+        })
+        finalized['emissions'] = finalized['shifted_power_util'] * finalized[self.actual_column]
+
+        self.num_rows += ready
+        self.total_measured_power += finalized[self.power_column].sum()
+        self.total_shifted_power += finalized['shifted_power_util'].sum()
+        self.total_carbon_emissions += finalized['emissions'].sum()
+        self.peak_power_utilization = max(self.peak_power_utilization, finalized['shifted_power_util'].max())
+
+        # Keep only the rows whose window is still open
+        self._time = self._time[ready:]
+        self._power = power[ready:]
+        self._forecast = self._forecast[ready:]
+        self._actual = self._actual[ready:]
+        self._shifted = shifted[ready:]
+        return finalized
+
+
+def iter_aligned_chunks(path, chunk_rows=100_000, columns=None, time_column='datetime'):
+    """
+    Read an aligned power/CI table in fixed-size chunks.
+
+    Parquet files are read batch by batch with pyarrow; anything else is read as
+    CSV with pandas' chunked reader.
+
+    Parameters:
+    - path: str or Path, the columnar store (.parquet) or a CSV file.
+    - chunk_rows: int, number of rows per chunk.
+    - columns: list of str, optional, columns to read. The time column is always read.
+    - time_column: str, timestamp column (parsed as dates when reading CSV).
+
+    Yields:
+    - pd.DataFrame chunks in file order.
+    """
+    path = Path(path)
+    if columns is not None and time_column not in columns:
+        columns = [time_column, *columns]
+
+    if path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, parse_dates=[time_column], chunksize=chunk_rows)
+
+
+def write_aligned_store(df, path, row_group_rows=100_000):
+    """
+    Save an aligned power/CI DataFrame as a Parquet file for chunked runs.
+
+    Parameters:
+    - df: pd.DataFrame, merged data sorted by time.
+    - path: str or Path, output .parquet file.
+    - row_group_rows: int, rows per row group (the unit read back per chunk).
+    """
+    df.to_parquet(path, index=False, row_group_size=row_group_rows)
+
+
+def run_chunked(chunks, shift_window, max_peak_power=None, sink=None, **columns):
+    """
+    Run a chunked schedule end to end.
+
+    Parameters:
+    - chunks: iterable of pd.DataFrame or TimeSeries, e.g. from iter_aligned_chunks.
+    - shift_window: int, number of hours (including the current one) to look ahead.
+    - max_peak_power: float, optional, peak power limit.
+    - sink: callable, optional, called with every finalized DataFrame.
+    - columns: column name overrides passed to ChunkedShiftScheduler.
+
+    Returns:
+    - dict with total_carbon_emissions, peak_power_utilization and num_rows.
+    """
+    scheduler = ChunkedShiftScheduler(shift_window, max_peak_power, **columns)
+    for chunk in chunks:
+        finalized = scheduler.process(chunk)
+        if sink is not None and finalized is not None:
+            sink(finalized)
+    finalized = scheduler.finish()
+    if sink is not None and finalized is not None:
+        sink(finalized)
+
+    # Verify that total power utilization remains the same
+    assert abs(scheduler.total_measured_power - scheduler.total_shifted_power) < 1e-6, \
+        "Total power utilization mismatch!"
+
+    return {
+        'total_carbon_emissions': scheduler.total_carbon_emissions,
+        'peak_power_utilization': scheduler.peak_power_utilization,
+        'num_rows': scheduler.num_rows,
+    }
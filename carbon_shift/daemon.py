@@ -0,0 +1,401 @@
+"""
+Asyncio scheduling daemon for temporal shift decisions.
+
+ShiftDaemon keeps the latest carbon intensity forecasts from a pluggable feed
+and answers "where should this hour's load go" for many PDU clients at once.
+Requests that arrive within the same tick are decided together: the forecast
+windows of the whole batch are gathered into one (requests x shift_window)
+matrix and ranked with a single argsort, then the per-PDU peak power limit (if
+any) is applied in arrival order.
+
+A feed is any async iterable of rows (dicts with 'datetime' and the forecast
+column). For local runs, ReplayFeedServer streams a data_SPC24 CSV over TCP as a
+stand-in for the real forecast provider and TcpFeed consumes it.
+
+Clients either await ShiftDaemon.place() in-process or connect to
+ShiftDaemon.serve() and exchange JSON lines:
+    -> {"pdu": "cella_pdu6", "hour": "2022-07-02 05:00:00", "load": 0.66}
+    <- {"ok": true, "dest_hour": "2022-07-02T09:00:00"}
+    -> {"op": "stats"}
+    <- {"ok": true, "stats": {...}}
+"""
+
+import asyncio
+import csv
+import json
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class ReplayFeedServer:
+    """
+    Local forecast provider that streams a CSV file row by row over TCP.
+
+    Parameters:
+    - path: str or Path, e.g. a data_SPC24 forecast file.
+    - interval: float, seconds between rows (0 streams as fast as possible).
+    """
+
+    def __init__(self, path, interval=0.0):
+        self.path = Path(path)
+        self.interval = interval
+        self._server = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start listening; returns the bound (host, port)."""
+        self._server = await asyncio.start_server(self._stream, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _stream(self, reader, writer):
+        try:
+            with open(self.path, newline='') as f:
+                for line in f:
+                    writer.write(line.encode())
+                    await writer.drain()
+                    if self.interval:
+                        await asyncio.sleep(self.interval)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+class TcpFeed:
+    """
+    Async iterable of forecast rows read from a ReplayFeedServer (CSV over TCP).
+
+    Parameters:
+    - host, port: address of the feed server.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    async def __aiter__(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            header = next(csv.reader([(await reader.readline()).decode()]))
+            while line := await reader.readline():
+                yield dict(zip(header, next(csv.reader([line.decode()]))))
+        finally:
+            writer.close()
+
+
+class CsvFeed:
+    """
+    Async iterable of forecast rows read directly from a CSV file.
+
+    Parameters:
+    - path: str or Path, e.g. a data_SPC24 forecast file.
+    - interval: float, seconds between rows.
+    """
+
+    def __init__(self, path, interval=0.0):
+        self.path = Path(path)
+        self.interval = interval
+
+    async def __aiter__(self):
+        with open(self.path, newline='') as f:
+            for row in csv.DictReader(f):
+                yield row
+                await asyncio.sleep(self.interval)
+
+
+class ShiftDaemon:
+    """
+    Long-lived temporal shift scheduler answering concurrent placement requests.
+
+    Parameters:
+    - feed: async iterable of forecast rows.
+    - shift_window: int, number of hours (including the requested one) to look ahead.
+    - max_peak_power: float, optional, per-PDU peak power limit (capped greedy).
+    - forecast_column: str, row field used as the forecast.
+    - tick: float, seconds requests are collected before a batch is decided.
+    - latency_samples: int, number of recent request latencies kept for the stats.
+    - max_feed_gap: int, feed rows more than this many grid steps past the latest
+      forecast are dropped (guards the buffer against bad timestamps).
+    """
+
+    def __init__(self, feed, shift_window=24, max_peak_power=None, forecast_column='predicted',
+                 tick=0.005, latency_samples=10_000, max_feed_gap=168):
+        self.feed = feed
+        self.shift_window = shift_window
+        self.max_peak_power = max_peak_power
+        self.forecast_column = forecast_column
+        self.tick = tick
+        self.max_feed_gap = max_feed_gap
+
+        # Forecasts on a regular grid starting at first_hour
+        self.first_hour = None
+        self.hour_step = None
+        self._forecast = np.empty(1024)
+        self._num_forecasts = 0
+
+        # Load already placed per PDU (hour index -> power utilization). Requests of a
+        # PDU are expected in hour order: hours before its latest request are dropped.
+        self.placed = {}
+
+        self._pending = []
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+        # Counters
+        self.num_requests = 0
+        self.num_batches = 0
+        self.num_unknown_hours = 0
+        self.num_failed_batches = 0
+        self.num_feed_rows = 0
+        self.num_dropped_feed_rows = 0
+        self._latencies = deque(maxlen=latency_samples)
+        self._started_at = None
+
+    async def start(self):
+        """Start consuming the feed and deciding batches in the background."""
+        self._started_at = time.perf_counter()
+        self._tasks = [asyncio.create_task(self._consume_feed()), asyncio.create_task(self._decide_batches())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    @property
+    def num_forecasts(self):
+        return self._num_forecasts
+
+    async def wait_for_forecasts(self, count, poll=0.001):
+        """Wait until at least `count` forecast rows have arrived (or the feed ended)."""
+        while self._num_forecasts < count:
+            feed_task = self._tasks[0] if self._tasks else None
+            if feed_task is not None and feed_task.done():
+                # Re-raise errors from the feed instead of waiting forever
+                feed_task.result()
+                break
+            await asyncio.sleep(poll)
+
+    async def place(self, pdu, hour, load):
+        """
+        Ask where the load of one PDU hour should run.
+
+        Parameters:
+        - pdu: str, PDU identifier (peak power is enforced per PDU).
+        - hour: datetime-like, the hour the load would originally run. Timezone-aware
+          hours are converted to the feed's timezone (UTC for a naive feed).
+        - load: float, power utilization of that hour.
+
+        Returns:
+        - pd.Timestamp, the destination hour.
+        """
+        hour = self._normalize_hour(hour)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((pdu, hour, float(load), time.perf_counter(), future))
+        self._wakeup.set()
+        return await future
+
+    def _normalize_hour(self, hour):
+        # Express a requested hour in the timezone of the feed (raises ValueError if invalid)
+        hour = pd.Timestamp(hour)
+        if hour is pd.NaT:
+            raise ValueError("Missing hour")
+        if self.first_hour is not None:
+            feed_tz = self.first_hour.tz
+            if hour.tz is None and feed_tz is not None:
+                hour = hour.tz_localize(feed_tz)
+            elif hour.tz is not None:
+                hour = hour.tz_convert(feed_tz)
+        return hour
+
+    def stats(self):
+        """Latency/throughput counters."""
+        latencies = np.asarray(self._latencies) * 1000.0
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            'requests': self.num_requests,
+            'batches': self.num_batches,
+            'mean_batch_size': self.num_requests / self.num_batches if self.num_batches else 0.0,
+            'unknown_hours': self.num_unknown_hours,
+            'failed_batches': self.num_failed_batches,
+            'feed_rows': self.num_feed_rows,
+            'dropped_feed_rows': self.num_dropped_feed_rows,
+            'throughput_per_s': self.num_requests / elapsed if elapsed else 0.0,
+            'latency_ms_p50': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'latency_ms_p95': float(np.percentile(latencies, 95)) if len(latencies) else None,
+            'latency_ms_max': float(latencies.max()) if len(latencies) else None,
+        }
+
+    async def serve(self, host='127.0.0.1', port=0):
+        """
+        Serve JSON-line placement requests over TCP.
+
+        Returns:
+        - asyncio.Server (its sockets give the bound port).
+        """
+        return await asyncio.start_server(self._handle_client, host, port)
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request must be a JSON object")
+                    if request.get('op') == 'stats':
+                        response = {'ok': True, 'stats': self.stats()}
+                    else:
+                        dest = await self.place(request['pdu'], request['hour'], request['load'])
+                        response = {'ok': True, 'dest_hour': dest.isoformat()}
+                except (ValueError, KeyError, TypeError) as error:
+                    response = {'ok': False, 'error': str(error)}
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _consume_feed(self):
+        async for row in self.feed:
+            self.num_feed_rows += 1
+            try:
+                timestamp = pd.Timestamp(row['datetime'])
+                value = float(row[self.forecast_column])
+                if timestamp is pd.NaT or not np.isfinite(value):
+                    raise ValueError("Missing datetime or forecast")
+                self._add_forecast(timestamp, value)
+            except (KeyError, ValueError, TypeError):
+                # Skip unusable rows and keep consuming the feed
+                self.num_dropped_feed_rows += 1
+
+    def _add_forecast(self, timestamp, value):
+        if self.first_hour is None:
+            self.first_hour = timestamp
+        elif self.hour_step is None and timestamp > self.first_hour:
+            # The grid step comes from the first strictly later row
+            self.hour_step = timestamp - self.first_hour
+
+        if timestamp == self.first_hour:
+            position = 0
+        elif timestamp < self.first_hour or self.hour_step is None or (timestamp - self.first_hour) % self.hour_step:
+            # Before the grid start or off the grid: nowhere to store it
+            self.num_dropped_feed_rows += 1
+            return
+        else:
+            position = (timestamp - self.first_hour) // self.hour_step
+
+        if position > self._num_forecasts + self.max_feed_gap:
+            # Too far ahead of the latest forecast (e.g. a bad timestamp)
+            self.num_dropped_feed_rows += 1
+            return
+
+        if position < self._num_forecasts:
+            # Revised forecast for an hour we already have
+            self._forecast[position] = value
+        else:
+            if position >= len(self._forecast):
+                grown = np.empty(max(2 * len(self._forecast), position + 1))
+                grown[:self._num_forecasts] = self._forecast[:self._num_forecasts]
+                self._forecast = grown
+            # Hours skipped by the feed have no forecast
+            self._forecast[self._num_forecasts:position] = np.inf
+            self._forecast[position] = value
+            self._num_forecasts = position + 1
+
+    def _positions(self, hours):
+        # Grid position of every requested hour, -1 when there is no forecast for it
+        if self.first_hour is None:
+            return np.full(len(hours), -1)
+        step = self.hour_step if self.hour_step is not None else pd.Timedelta(hours=1)
+        offsets = ((pd.DatetimeIndex(hours) - self.first_hour) / step).to_numpy(dtype=np.float64)
+        positions = np.floor(offsets).astype(np.int64)
+        positions[(offsets != positions) | (positions < 0) | (positions >= self._num_forecasts)] = -1
+        return positions
+
+    async def _decide_batches(self):
+        while True:
+            await self._wakeup.wait()
+            # Let requests arriving in the same tick join the batch
+            await asyncio.sleep(self.tick)
+            self._wakeup.clear()
+            batch, self._pending = self._pending, []
+            if not batch:
+                continue
+            try:
+                self._decide(batch)
+            except Exception as error:
+                # Fail this batch's requests but keep serving later ones
+                self.num_failed_batches += 1
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+
+    def _decide(self, batch):
+        pdus, hours, loads, arrived, futures = zip(*batch)
+        # The feed may have started after these requests were queued
+        hours = [self._normalize_hour(hour) for hour in hours]
+        positions = self._positions(hours)
+        known = positions >= 0
+        window = max(self.shift_window, 1)
+
+        # Gather every request's forecast window into one matrix and rank it once
+        candidates = positions[:, np.newaxis] + np.arange(window)[np.newaxis, :]
+        in_range = known[:, np.newaxis] & (candidates < self._num_forecasts)
+        values = np.where(in_range, self._forecast[np.minimum(candidates, self._num_forecasts - 1)], np.inf)
+        order = np.argsort(values, axis=1, kind='stable')
+        ranked = np.take_along_axis(candidates, order, axis=1)
+        ranked_valid = np.take_along_axis(in_range, order, axis=1)
+
+        if self.max_peak_power is None:
+            destinations = np.where(known, ranked[:, 0], -1)
+        else:
+            destinations = np.full(len(batch), -1)
+            latest = {}
+            for k in np.flatnonzero(known):
+                placed = self.placed.setdefault(pdus[k], {})
+                target = positions[k]
+                for candidate in ranked[k][ranked_valid[k]]:
+                    if placed.get(candidate, 0.0) + loads[k] <= self.max_peak_power:
+                        target = candidate
+                        break
+                placed[target] = placed.get(target, 0.0) + loads[k]
+                destinations[k] = target
+                latest[pdus[k]] = max(latest.get(pdus[k], -1), positions[k])
+
+            # Later requests of a PDU cannot target hours before its latest request
+            for pdu, window_start in latest.items():
+                placed = self.placed[pdu]
+                for position in [position for position in placed if position < window_start]:
+                    del placed[position]
+
+        now = time.perf_counter()
+        step = self.hour_step if self.hour_step is not None else pd.Timedelta(hours=1)
+        for k, future in enumerate(futures):
+            if destinations[k] >= 0:
+                dest = self.first_hour + int(destinations[k]) * step
+            else:
+                # No forecast for this hour yet: leave the load where it is
+                dest = hours[k]
+                self.num_unknown_hours += 1
+            if not future.done():
+                future.set_result(dest)
+            self._latencies.append(now - arrived[k])
+
+        self.num_requests += len(batch)
+        self.num_batches += 1
@@ -0,0 +1,225 @@
+"""
+Partitioned Parquet export of sweep results with a background writer.
+
+The scripts used to write a full_data_shift_*.csv and an analysis_shift_*.txt
+file per sweep point, synchronously inside the compute loop. SweepExporter
+instead queues the per-hour columns of every sweep point and a one-row summary,
+and a background thread converts them to Arrow and writes them into two hive
+partitioned Parquet datasets:
+
+    <root>/points/region=CISO/pdu=cella_pdu6/algorithm=.../alpha=0.1/window=12/part-*.parquet
+    <root>/summary/region=CISO/pdu=cella_pdu6/algorithm=.../alpha=0.1/window=12/part-*.parquet
+
+Reading one sweep point back with read_sweep_point() filters on the partition
+columns, so only that point's files are opened.
+
+Usage:
+    with SweepExporter('sweep_results') as exporter:
+        exporter.write({'region': 'CISO', 'pdu': 'cella_pdu6', 'algorithm': 'power_cap',
+                        'alpha': 0.1, 'window': 12}, columns, summary={'total_carbon_emissions': total})
+    df = read_sweep_point('sweep_results', region='CISO', alpha=0.1, window=12)
+"""
+
+import queue
+import shutil
+import threading
+import uuid
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARTITION_COLUMNS = ('region', 'pdu', 'algorithm', 'alpha', 'window')
+
+# Directory name pyarrow uses for a None partition value
+_HIVE_NULL = '__HIVE_DEFAULT_PARTITION__'
+
+# Sentinel telling the writer thread to flush and stop
+_STOP = object()
+
+
+class SweepExporter:
+    """
+    Buffers sweep outputs and writes them to Parquet on a background thread.
+
+    Parameters:
+    - root: str or Path, output directory of the datasets.
+    - partition_columns: tuple of str, keys every write() must provide.
+    - max_buffer_rows: int, buffered per-hour rows that trigger a flush.
+    - max_queued: int, sweep points queued before write() blocks (bounds memory).
+    - overwrite: bool, replace the existing data of every partition this exporter writes.
+    """
+
+    def __init__(self, root, partition_columns=PARTITION_COLUMNS, max_buffer_rows=1_000_000,
+                 max_queued=64, overwrite=False):
+        self.root = Path(root)
+        self.partition_columns = tuple(partition_columns)
+        self.max_buffer_rows = max_buffer_rows
+        self.overwrite = overwrite
+        self._seen_partitions = set()
+
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._points = []
+        self._summaries = []
+        self._buffered_rows = 0
+        self._flushes = 0
+        self._run_id = uuid.uuid4().hex[:8]
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='SweepExporter', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, partition, columns=None, summary=None):
+        """
+        Queue the outputs of one sweep point. Returns without waiting for I/O.
+
+        Parameters:
+        - partition: dict with a value for every partition column (None if it does not apply).
+        - columns: dict of column name -> 1-D array (or a DataFrame), optional,
+          the per-hour data of the point. It must not be modified afterwards.
+        - summary: dict of scalar results of the point, optional.
+        """
+        self._raise_if_failed()
+        if self._closed:
+            raise RuntimeError("write() called after close()")
+        missing = set(self.partition_columns) - set(partition)
+        if missing:
+            raise ValueError(f"Missing partition values: {sorted(missing)}")
+        self._queue.put((dict(partition), columns, summary))
+
+    def close(self):
+        """Flush everything that is buffered and stop the writer thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._raise_if_failed()
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError("Background Parquet writer failed") from self._error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            if self._error is not None:
+                # Keep draining so producers never block on a dead writer
+                continue
+            try:
+                self._add(*item)
+                if self._buffered_rows >= self.max_buffer_rows:
+                    self._flush()
+            except Exception as error:
+                self._error = error
+
+        if self._error is None:
+            try:
+                self._flush()
+            except Exception as error:
+                self._error = error
+
+    def _with_partition(self, table, partition):
+        for name in self.partition_columns:
+            table = table.append_column(name, pa.array([partition[name]] * len(table)))
+        return table
+
+    def _clear_partition(self, partition):
+        # Remove what earlier runs wrote to this partition, once per exporter
+        directory = Path(*(f'{name}={_HIVE_NULL if partition[name] is None else partition[name]}'
+                           for name in self.partition_columns))
+        if directory not in self._seen_partitions:
+            self._seen_partitions.add(directory)
+            for name in ('points', 'summary'):
+                shutil.rmtree(self.root / name / directory, ignore_errors=True)
+
+    def _add(self, partition, columns, summary):
+        if self.overwrite:
+            self._clear_partition(partition)
+        if columns is not None:
+            table = pa.Table.from_pandas(columns, preserve_index=False) if hasattr(columns, 'columns') \
+                else pa.table(columns)
+            self._points.append(self._with_partition(table, partition))
+            self._buffered_rows += len(table)
+        if summary is not None:
+            self._summaries.append(self._with_partition(pa.Table.from_pylist([summary]), partition))
+
+    def _flush(self):
+        for name, tables in (('points', self._points), ('summary', self._summaries)):
+            if not tables:
+                continue
+            table = pa.concat_tables(tables, promote_options='default')
+            partitioning = ds.partitioning(
+                pa.schema([table.schema.field(column) for column in self.partition_columns]), flavor='hive')
+            ds.write_dataset(
+                table, self.root / name, format='parquet', partitioning=partitioning,
+                basename_template=f'part-{self._run_id}-{self._flushes}-{{i}}.parquet',
+                existing_data_behavior='overwrite_or_ignore',
+            )
+            # Hive directory names lose their types; keep the schema next to the data,
+            # merged with what other runs sharing this root already wrote
+            metadata_path = self.root / name / '_common_metadata'
+            schema = table.schema
+            if metadata_path.exists():
+                schema = pa.unify_schemas([pq.read_schema(metadata_path), schema], promote_options='permissive')
+            pq.write_metadata(schema, metadata_path)
+        self._flushes += 1
+        self._points = []
+        self._summaries = []
+        self._buffered_rows = 0
+
+
+def _dataset(root, name, partition_columns=PARTITION_COLUMNS):
+    path = Path(root) / name
+    schema = pq.read_schema(path / '_common_metadata')
+    partitioning = ds.partitioning(
+        pa.schema([schema.field(column) for column in partition_columns]), flavor='hive')
+    return ds.dataset(path, schema=schema, format='parquet', partitioning=partitioning)
+
+
+def _filter_expression(filters):
+    expression = None
+    for column, value in filters.items():
+        condition = ds.field(column) == value
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_sweep_point(root, columns=None, partition_columns=PARTITION_COLUMNS, **filters):
+    """
+    Read the per-hour data of the sweep points matching the partition filters.
+
+    Parameters:
+    - root: str or Path, the exporter's root directory.
+    - columns: list of str, optional, columns to read.
+    - partition_columns: tuple of str, the partition columns used when writing.
+    - filters: partition column values, e.g. region='CISO', alpha=0.1, window=12.
+
+    Returns:
+    - pd.DataFrame
+    """
+    table = _dataset(root, 'points', partition_columns).to_table(columns=columns, filter=_filter_expression(filters))
+    return table.to_pandas()
+
+
+def read_summary(root, partition_columns=PARTITION_COLUMNS, **filters):
+    """
+    Read the summary rows of the sweep points matching the partition filters.
+
+    Parameters:
+    - root: str or Path, the exporter's root directory.
+    - partition_columns: tuple of str, the partition columns used when writing.
+    - filters: partition column values, e.g. region='CISO'.
+
+    Returns:
+    - pd.DataFrame with one row per sweep point.
+    """
+    return _dataset(root, 'summary', partition_columns).to_table(filter=_filter_expression(filters)).to_pandas()
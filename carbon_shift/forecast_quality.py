@@ -0,0 +1,245 @@
+"""
+Forecast-quality and SPCI interval coverage analytics.
+
+Every data_SPC24 file carries the actual and predicted carbon intensity plus a
+'lower bound'/'upper bound' interval at one alpha level. ForecastQuality stacks
+all regions x alphas into (region, alpha, hour) arrays and computes, in one
+vectorized pass:
+    - rolling MAPE of the point forecast,
+    - empirical interval coverage against the nominal 1 - alpha,
+    - mean interval width,
+    - hour-of-day profiles of the absolute percentage error and the bias.
+
+Results are kept as running sums, so new rows can be fed with update() without
+recomputing the history. Non-finite values (e.g. gaps in a live feed) are
+skipped per region x alpha: the point forecast statistics only count hours
+with a finite actual and prediction, the interval statistics only hours with a
+finite actual and bounds.
+
+Usage:
+    quality = ForecastQuality.from_directory(Path('..') / 'data_SPC24')
+    print(quality.summary())
+    quality.update(datetimes, actual, predicted, lower, upper)  # new rows
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SPCI_COLUMNS = ['datetime', 'actual', 'predicted', 'lower bound', 'upper bound']
+
+
+def spci_path(data_dir, region, alpha):
+    """Path of the SPCI forecast file of a region and alpha level."""
+    return Path(data_dir) / f'SPCI-{region}' / f'{region}_direct_24hr_CI_forecasts_spci__alpha_{alpha}.csv'
+
+
+def load_spci(data_dir, regions, alphas):
+    """
+    Read the SPCI files of all regions x alphas into stacked arrays.
+
+    Only the hours present in every file are kept.
+
+    Parameters:
+    - data_dir: str or Path, the data_SPC24 directory.
+    - regions: list of str, e.g. ['CISO', 'ERCO', 'ISNE'].
+    - alphas: list of float, e.g. [0.1, 0.05, 0.01].
+
+    Returns:
+    - (datetimes, arrays) where arrays maps 'actual', 'predicted', 'lower bound'
+      and 'upper bound' to (region, alpha, hour) float64 arrays.
+    """
+    frames = {
+        (region, alpha): pd.read_csv(spci_path(data_dir, region, alpha), usecols=SPCI_COLUMNS,
+                                     parse_dates=['datetime']).set_index('datetime')
+        for region in regions for alpha in alphas
+    }
+
+    # Keep only the hours every file has
+    common = None
+    for df in frames.values():
+        common = df.index if common is None else common.intersection(df.index)
+    common = common.sort_values()
+
+    arrays = {}
+    for column in SPCI_COLUMNS[1:]:
+        arrays[column] = np.stack([
+            np.stack([frames[region, alpha].loc[common, column].to_numpy(dtype=np.float64) for alpha in alphas])
+            for region in regions
+        ])
+    return common, arrays
+
+
+class ForecastQuality:
+    """
+    Incrementally updated forecast-quality statistics for regions x alphas.
+
+    Parameters:
+    - regions: list of str, region names (first array axis).
+    - alphas: list of float, SPCI alpha levels (second array axis).
+    - rolling_window: int, number of hours in the rolling MAPE.
+    """
+
+    def __init__(self, regions, alphas, rolling_window=24):
+        self.regions = list(regions)
+        self.alphas = list(alphas)
+        self.rolling_window = rolling_window
+        shape = (len(self.regions), len(self.alphas))
+
+        # Running sums over all rows seen so far, with per region x alpha valid counts
+        self.count = 0
+        self.interval_count = np.zeros(shape)
+        self.covered = np.zeros(shape)
+        self.width_sum = np.zeros(shape)
+        self.point_count = np.zeros(shape)
+        self.ape_sum = np.zeros(shape)
+        self.hour_count = np.zeros(shape + (24,))
+        self.hour_ape_sum = np.zeros(shape + (24,))
+        self.hour_bias_sum = np.zeros(shape + (24,))
+
+        # Last rolling_window - 1 absolute percentage errors (0 where invalid) and
+        # validity flags, carried between updates
+        self._ape_tail = np.zeros(shape + (0,))
+        self._valid_tail = np.zeros(shape + (0,))
+        self._rolling = []
+        self._datetimes = []
+
+    @classmethod
+    def from_directory(cls, data_dir, regions=None, alphas=(0.1, 0.05, 0.01), rolling_window=24):
+        """
+        Build the statistics from the SPCI files of a data_SPC24 directory.
+
+        Parameters:
+        - data_dir: str or Path, the data_SPC24 directory.
+        - regions: list of str, optional (default: every SPCI-* subdirectory).
+        - alphas: list of float, SPCI alpha levels.
+        - rolling_window: int, number of hours in the rolling MAPE.
+        """
+        if regions is None:
+            regions = sorted(p.name[len('SPCI-'):] for p in Path(data_dir).glob('SPCI-*') if p.is_dir())
+        quality = cls(regions, alphas, rolling_window)
+        datetimes, arrays = load_spci(data_dir, quality.regions, quality.alphas)
+        quality.update(datetimes, arrays['actual'], arrays['predicted'],
+                       arrays['lower bound'], arrays['upper bound'])
+        return quality
+
+    def update(self, datetimes, actual, predicted, lower, upper):
+        """
+        Add new rows for every region x alpha.
+
+        Parameters:
+        - datetimes: array-like of length T, timestamps of the new rows (in order).
+        - actual, predicted, lower, upper: arrays broadcastable to (region, alpha, T).
+        """
+        datetimes = pd.DatetimeIndex(datetimes)
+        shape = (len(self.regions), len(self.alphas), len(datetimes))
+        actual, predicted, lower, upper = (np.broadcast_to(np.asarray(a, dtype=np.float64), shape)
+                                           for a in (actual, predicted, lower, upper))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            error = predicted - actual
+            ape = np.abs(error) / np.abs(actual)
+
+        # Skip non-finite values instead of letting them poison the running sums
+        point_valid = np.isfinite(ape) & np.isfinite(error)
+        interval_valid = np.isfinite(actual) & np.isfinite(lower) & np.isfinite(upper)
+        error = np.where(point_valid, error, 0.0)
+        ape = np.where(point_valid, ape, 0.0)
+
+        # Interval coverage and width
+        self.interval_count += interval_valid.sum(axis=2)
+        self.covered += (interval_valid & (lower <= actual) & (actual <= upper)).sum(axis=2)
+        self.width_sum += np.where(interval_valid, upper - lower, 0.0).sum(axis=2)
+        self.point_count += point_valid.sum(axis=2)
+        self.ape_sum += ape.sum(axis=2)
+        self.count += len(datetimes)
+
+        # Hour-of-day profiles through a one-hot (T x 24) matrix
+        one_hot = np.zeros((len(datetimes), 24))
+        one_hot[np.arange(len(datetimes)), datetimes.hour] = 1.0
+        self.hour_count += point_valid @ one_hot
+        self.hour_ape_sum += ape @ one_hot
+        self.hour_bias_sum += error @ one_hot
+
+        # Rolling MAPE over the valid hours of the carried tail plus the new rows
+        window = self.rolling_window
+        history = np.concatenate([self._ape_tail, ape], axis=2)
+        valid_history = np.concatenate([self._valid_tail, point_valid], axis=2)
+        zeros = np.zeros(shape[:2] + (1,))
+        cumsum = np.concatenate([zeros, np.cumsum(history, axis=2)], axis=2)
+        valid_cumsum = np.concatenate([zeros, np.cumsum(valid_history, axis=2)], axis=2)
+        rolling = np.full(shape, np.nan)
+        seen_before = self._ape_tail.shape[2]
+        full = np.arange(seen_before, seen_before + shape[2]) >= window - 1
+        ends = np.arange(seen_before + 1, seen_before + shape[2] + 1)[full]
+        valid_in_window = valid_cumsum[:, :, ends] - valid_cumsum[:, :, ends - window]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rolling[:, :, full] = np.where(valid_in_window > 0,
+                                           (cumsum[:, :, ends] - cumsum[:, :, ends - window]) / valid_in_window,
+                                           np.nan)
+
+        tail_start = max(history.shape[2] - (window - 1), 0)
+        self._ape_tail = history[:, :, tail_start:]
+        self._valid_tail = valid_history[:, :, tail_start:]
+        self._rolling.append(rolling)
+        self._datetimes.append(datetimes)
+
+    def summary(self):
+        """
+        Per region x alpha coverage, interval width and MAPE.
+
+        Returns:
+        - pd.DataFrame with one row per region x alpha.
+        """
+        regions, alphas = np.meshgrid(self.regions, self.alphas, indexing='ij')
+        nominal = 1 - np.asarray(self.alphas, dtype=np.float64)[np.newaxis, :]
+        interval_count = np.maximum(self.interval_count, 1)
+        coverage = self.covered / interval_count
+        rolling = [r for r in self._rolling if r.shape[2]]
+        latest = rolling[-1][:, :, -1] if rolling else np.full(self.covered.shape, np.nan)
+        return pd.DataFrame({
+            'region': regions.ravel(),
+            'alpha': alphas.ravel(),
+            'nominal_coverage': np.broadcast_to(nominal, coverage.shape).ravel(),
+            'empirical_coverage': coverage.ravel(),
+            'coverage_gap': (coverage - nominal).ravel(),
+            'mean_interval_width': (self.width_sum / interval_count).ravel(),
+            'mape': (self.ape_sum / np.maximum(self.point_count, 1)).ravel(),
+            'latest_rolling_mape': latest.ravel(),
+            'num_hours': self.count,
+            'num_forecast_hours': self.point_count.ravel().astype(np.int64),
+            'num_interval_hours': self.interval_count.ravel().astype(np.int64),
+        })
+
+    def hour_of_day_profile(self):
+        """
+        Mean absolute percentage error and mean bias (predicted - actual) per hour of day.
+
+        Returns:
+        - pd.DataFrame with one row per region x alpha x hour.
+        """
+        counts = np.where(self.hour_count > 0, self.hour_count, np.nan)
+        regions, alphas, hours = np.meshgrid(self.regions, self.alphas, np.arange(24), indexing='ij')
+        return pd.DataFrame({
+            'region': regions.ravel(),
+            'alpha': alphas.ravel(),
+            'hour': hours.ravel(),
+            'mape': (self.hour_ape_sum / counts).ravel(),
+            'bias': (self.hour_bias_sum / counts).ravel(),
+        })
+
+    def rolling_mape(self):
+        """
+        Rolling MAPE of every region x alpha over all rows seen.
+
+        Returns:
+        - pd.DataFrame indexed by datetime with (region, alpha) columns.
+        """
+        columns = pd.MultiIndex.from_product([self.regions, self.alphas], names=['region', 'alpha'])
+        if not self._rolling:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='datetime'))
+
+        values = np.concatenate(self._rolling, axis=2)
+        index = self._datetimes[0].append(self._datetimes[1:]).rename('datetime')
+        return pd.DataFrame(values.reshape(-1, values.shape[2]).T, index=index, columns=columns)
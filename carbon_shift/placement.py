@@ -0,0 +1,121 @@
+"""
+Splittable load placement with a time-varying capacity limit.
+
+The capped greedy in temporal_shift_power_cap_* needs room for a whole hour's
+load in a single slot, otherwise the load falls back to its original hour. Here
+an hour's load fills the remaining capacity of the lowest forecast slot in its
+window and spills the rest into the next lowest slot, and so on. Capacity can
+differ per hour (e.g. grid demand-response limits).
+
+The open slots of the current window live in a min segment tree keyed by
+(forecast, hour). The window slides by one hour per row, and the slot that
+leaves the window always frees the ring position needed by the slot that
+enters, so the tree never holds more than shift_window leaves. Finding the
+cheapest slot with room is a root lookup and every capacity or window update is
+O(log shift_window).
+
+Usage:
+    moves = splittable_shift_moves(power, forecast, capacity=dr_limits, shift_window=12)
+"""
+
+import numpy as np
+
+from .schedule import ScheduleMoves, _power_and_forecast
+from .series import TimeSeries
+
+# Key of a slot without room (or outside the data); compares above any real slot
+_CLOSED = (np.inf, np.iinfo(np.int64).max)
+
+
+class _MinSegmentTree:
+    """Point-update / global-min segment tree over (forecast, hour) keys."""
+
+    __slots__ = ('size', 'tree')
+
+    def __init__(self, num_leaves):
+        self.size = 1
+        while self.size < num_leaves:
+            self.size *= 2
+        self.tree = [_CLOSED] * (2 * self.size)
+
+    def update(self, pos, key):
+        pos += self.size
+        tree = self.tree
+        tree[pos] = key
+        pos //= 2
+        while pos:
+            left, right = tree[2 * pos], tree[2 * pos + 1]
+            tree[pos] = left if left <= right else right
+            pos //= 2
+
+    def min(self):
+        return self.tree[1]
+
+
+def splittable_shift_moves(power, forecast, capacity, shift_window, min_room=1e-12):
+    """
+    Place each hour's load across the lowest forecast slots that still have room.
+
+    The window for hour i covers hours i .. i + shift_window - 1, as in the
+    capped greedy. Load that does not fit anywhere in the window stays at its
+    original hour, exceeding that hour's capacity like the original fallback.
+
+    Parameters:
+    - power: array-like, measured power utilization per hour, or a TimeSeries
+      with a 'measured_power_util' column.
+    - forecast: array-like, forecasted carbon intensity per hour, or a column
+      name when power is a TimeSeries.
+    - capacity: float or array-like, maximum shifted power utilization per hour,
+      or a column name when power is a TimeSeries.
+    - shift_window: int, number of hours (including the current one) to look ahead.
+    - min_room: float, remaining capacity below which a slot is treated as full.
+
+    Returns:
+    - ScheduleMoves, where one source hour may have several moves.
+    """
+    if isinstance(power, TimeSeries) and isinstance(capacity, str):
+        capacity = power[capacity]
+    power, forecast = _power_and_forecast(power, forecast)
+    num_rows = len(power)
+    room = np.broadcast_to(np.asarray(capacity, dtype=np.float64), (num_rows,)).copy()
+
+    src, dst, amount = [], [], []
+    if shift_window == 0 or num_rows == 0:
+        return ScheduleMoves(power, src, dst, amount)
+
+    def slot_key(j):
+        return (forecast[j], j) if j < num_rows and room[j] > min_room else _CLOSED
+
+    # Hour j always lives at ring position j % shift_window
+    tree = _MinSegmentTree(shift_window)
+    for j in range(min(shift_window, num_rows)):
+        tree.update(j, slot_key(j))
+
+    for i in range(num_rows):
+        # Slide the window: hour i - 1 leaves, hour i + shift_window - 1 enters
+        if i:
+            entering = i + shift_window - 1
+            tree.update(entering % shift_window, slot_key(entering))
+
+        remaining = power[i]
+        while remaining > 0:
+            _, j = tree.min()
+            if j == _CLOSED[1]:
+                break
+
+            # Fill the cheapest slot and spill the rest to the next one
+            take = min(remaining, room[j])
+            room[j] -= take
+            remaining -= take
+            if j != i:
+                src.append(i)
+                dst.append(j)
+                amount.append(take)
+            if room[j] <= min_room:
+                tree.update(j % shift_window, _CLOSED)
+
+        # Whatever did not fit stays at the original hour
+        if remaining > 0:
+            room[i] -= remaining
+
+    return ScheduleMoves(power, src, dst, amount)
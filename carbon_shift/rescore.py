@@ -0,0 +1,164 @@
+"""
+Incremental re-scoring of stored sweep results when actuals are revised.
+
+A revised 'actual' carbon intensity does not change any schedule, it only
+changes the emissions of the hours that received load. SweepStore keeps the
+per-hour shifted load of every sweep point in one (points x hours) matrix, so a
+batch of revisions updates all sweep totals with a single product over the
+changed hours instead of rerunning the schedulers.
+
+Usage:
+    store = SweepStore(merged_df['datetime'], merged_df['actual'])
+    for shift_window in range(25):
+        moves = temporal_shift_moves(power, forecast, shift_window)
+        store.add({'shift_window': shift_window}, moves)
+    store.save('CISO_sweeps.npz')
+
+    store = SweepStore.load('CISO_sweeps.npz')
+    store.revise(revised_df)  # columns: datetime, actual
+    print(store.results())
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from .schedule import ScheduleMoves
+
+
+class SweepStore:
+    """
+    Shifted load vectors of many sweep points aligned on one hourly index.
+
+    Parameters:
+    - datetimes: array-like, timestamps of the hours (shared by all sweep points).
+    - actual: array-like, actual carbon intensity for those hours.
+    """
+
+    def __init__(self, datetimes, actual):
+        self.index = pd.DatetimeIndex(datetimes)
+        self.actual = np.asarray(actual, dtype=np.float64).copy()
+        if len(self.actual) != len(self.index):
+            raise ValueError("datetimes and actual must have the same length")
+
+        self.keys = []
+        self._loads = np.empty((0, len(self.index)))
+        self._pending = []
+        self.total_emissions = np.empty(0)
+
+    @classmethod
+    def from_series(cls, series, actual_column='actual'):
+        """Start a store on the time grid and actual column of a TimeSeries."""
+        return cls(series.datetimes(), series[actual_column])
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def loads(self):
+        """(points x hours) matrix of shifted power utilization."""
+        if self._pending:
+            self._loads = np.vstack([self._loads] + self._pending)
+            self._pending = []
+        return self._loads
+
+    def add(self, key, schedule):
+        """
+        Store one sweep point.
+
+        Parameters:
+        - key: dict, sweep parameters identifying the point (e.g. shift_window, alpha).
+        - schedule: ScheduleMoves or array-like of shifted power utilization.
+        """
+        if isinstance(schedule, ScheduleMoves):
+            load = schedule.shifted_load()
+        else:
+            load = np.asarray(schedule, dtype=np.float64)
+        if len(load) != len(self.index):
+            raise ValueError(f"Expected a load vector of length {len(self.index)}, got {len(load)}")
+
+        self.keys.append(dict(key))
+        self._pending.append(load[np.newaxis, :])
+        self.total_emissions = np.append(self.total_emissions, load @ self.actual)
+
+    def revise(self, revisions):
+        """
+        Apply revised actual values and update the emissions of every sweep point.
+
+        Parameters:
+        - revisions: pd.Series indexed by datetime, dict of datetime -> actual, or a
+          DataFrame with 'datetime' and 'actual' columns.
+
+        Returns:
+        - int, number of hours that changed. Revisions outside the index are ignored.
+        """
+        if isinstance(revisions, pd.DataFrame):
+            revisions = revisions.set_index('datetime')['actual']
+        elif isinstance(revisions, dict):
+            revisions = pd.Series(revisions)
+
+        # The last revision of an hour wins
+        revisions = revisions[~revisions.index.duplicated(keep='last')]
+
+        positions = self.index.get_indexer(pd.DatetimeIndex(revisions.index))
+        known = positions >= 0
+        positions = positions[known]
+        new_values = revisions.to_numpy(dtype=np.float64)[known]
+
+        delta = new_values - self.actual[positions]
+        changed = delta != 0
+        positions, delta = positions[changed], delta[changed]
+        if not len(positions):
+            return 0
+
+        # Only the columns of the changed hours are touched
+        self.total_emissions = self.total_emissions + self.loads[:, positions] @ delta
+        self.actual[positions] += delta
+        return len(positions)
+
+    def recompute(self):
+        """Recompute all totals from scratch (drops accumulated rounding from revisions)."""
+        self.total_emissions = self.loads @ self.actual
+        return self.total_emissions
+
+    def emissions_by_hour(self, point):
+        """
+        Per-hour emissions of one sweep point.
+
+        Parameters:
+        - point: int, position of the sweep point in the order it was added.
+        """
+        return pd.Series(self.loads[point] * self.actual, index=self.index, name='emissions')
+
+    def results(self):
+        """
+        Sweep parameters and current total emissions of every sweep point.
+
+        Returns:
+        - pd.DataFrame with one row per sweep point.
+        """
+        df = pd.DataFrame(self.keys)
+        df['total_carbon_emissions'] = self.total_emissions
+        return df
+
+    def save(self, path):
+        """Save the store as a compressed .npz file."""
+        np.savez_compressed(
+            path,
+            datetimes=self.index.values.astype('datetime64[ns]'),
+            actual=self.actual,
+            loads=self.loads,
+            total_emissions=self.total_emissions,
+            keys=np.array(json.dumps(self.keys, default=lambda value: value.item())),
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load a store written by save()."""
+        with np.load(path) as data:
+            store = cls(data['datetimes'], data['actual'])
+            store.keys = json.loads(str(data['keys']))
+            store._loads = data['loads']
+            store.total_emissions = data['total_emissions']
+        return store
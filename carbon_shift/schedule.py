@@ -0,0 +1,229 @@
+"""
+Sparse move-list representation of temporal shift schedules.
+
+A shift schedule only moves load from a source hour to a destination hour, so
+instead of materializing a full 'shifted_power_util' column for every run the
+schedulers below return a ScheduleMoves object: the original power trace plus
+the (source_hour, dest_hour, amount) triples for load that actually moved.
+
+The move list can be scored against any number of carbon intensity 'actual'
+series (other regions, other alpha levels, revised actuals) without rerunning
+the scheduler or copying DataFrames.
+
+Usage:
+    moves = temporal_shift_power_cap_moves(power, forecast, shift_window=12, max_peak_power=cap)
+    total_emissions = score_moves(moves, actual)
+    totals_per_region = score_moves(moves, {'CISO': ciso_actual, 'ERCO': erco_actual})
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .series import ACTUAL_COLUMN, POWER_COLUMN, TimeSeries
+
+
+class ScheduleMoves:
+    """
+    Original power trace plus the sparse list of moves applied to it.
+
+    Attributes:
+    - power: np.ndarray, the original per-hour power utilization (not copied).
+    - src: np.ndarray of int, source hour index of each move.
+    - dst: np.ndarray of int, destination hour index of each move.
+    - amount: np.ndarray of float, power utilization moved from src to dst.
+    """
+
+    __slots__ = ('power', 'src', 'dst', 'amount')
+
+    def __init__(self, power, src, dst, amount):
+        self.power = power
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        self.amount = np.asarray(amount, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.amount)
+
+    def __repr__(self):
+        return f"ScheduleMoves(num_hours={len(self.power)}, num_moves={len(self)})"
+
+    @property
+    def num_hours(self):
+        return len(self.power)
+
+    def shifted_load(self):
+        """
+        Materialize the per-hour shifted power utilization.
+
+        Returns:
+        - np.ndarray, equivalent to the 'shifted_power_util' column of the scripts.
+        """
+        n = len(self.power)
+        # Remove the moved load first so fully moved hours end up at exactly zero
+        load = np.asarray(self.power, dtype=np.float64) - np.bincount(self.src, weights=self.amount, minlength=n)
+        load += np.bincount(self.dst, weights=self.amount, minlength=n)
+        return load
+
+    def peak(self):
+        """Peak shifted power utilization."""
+        return self.shifted_load().max()
+
+    def to_frame(self, datetimes=None):
+        """
+        Return the move list as a DataFrame with source/dest hours and amounts.
+
+        Parameters:
+        - datetimes: array-like, optional, timestamps used to label the hour indices.
+        """
+        df = pd.DataFrame({'source_hour': self.src, 'dest_hour': self.dst, 'amount': self.amount})
+        if datetimes is not None:
+            datetimes = np.asarray(datetimes)
+            df['source_datetime'] = datetimes[self.src]
+            df['dest_datetime'] = datetimes[self.dst]
+        return df
+
+
+def _as_float(values):
+    # float32 arrays (e.g. from a TimeSeries) are used as-is instead of copied
+    values = np.asarray(values)
+    return values if values.dtype.kind == 'f' else values.astype(np.float64)
+
+
+def _power_and_forecast(power, forecast):
+    # Accept a TimeSeries with the forecast given as a column name
+    if isinstance(power, TimeSeries):
+        if isinstance(forecast, str):
+            forecast = power[forecast]
+        power = power[POWER_COLUMN]
+    return _as_float(power), _as_float(forecast)
+
+
+def _actual_values(actual):
+    return actual[ACTUAL_COLUMN] if isinstance(actual, TimeSeries) else actual
+
+
+def _moves_from_destinations(power, dst):
+    # Keep only the hours whose load actually left its original slot
+    src = np.arange(len(power))
+    moved = dst != src
+    return ScheduleMoves(power, src[moved], dst[moved], power[moved])
+
+
+def _window_argmin(forecast, shift_window, count):
+    # Destination of the first `count` rows: the first minimum forecast in
+    # forecast[i:i + shift_window], clipped at the end like iloc[i:end_idx]
+    padded = np.concatenate([forecast, np.full(shift_window - 1, np.inf)])
+    windows = sliding_window_view(padded, shift_window)[:count]
+    return windows.argmin(axis=1) + np.arange(count)
+
+
+def _place_power_cap(power, forecast, shifted, dst, start, stop, shift_window, max_peak_power):
+    # Place rows start .. stop - 1 greedily, updating shifted and dst in place.
+    # Windows are clipped at len(forecast), so callers streaming the data must
+    # only pass rows whose full window has already arrived.
+    num_rows = len(forecast)
+    for i in range(start, stop):
+        end_idx = min(i + shift_window, num_rows)
+
+        # Candidate hours sorted by forecast, lowest first
+        order = i + np.argsort(forecast[i:end_idx], kind='stable')
+
+        # Pick the first candidate that stays within the peak power limit
+        fits = np.flatnonzero(shifted[order] + power[i] <= max_peak_power)
+        target = order[fits[0]] if fits.size else i
+
+        shifted[target] += power[i]
+        dst[i] = target
+
+
+def temporal_shift_moves(power, forecast, shift_window):
+    """
+    Shift every hour's load to the lowest forecast hour within its window.
+
+    The window for hour i covers hours i .. i + shift_window - 1 (clipped at the
+    end of the data), matching the singleDataPoint scripts. A shift_window of 0
+    means no optimization.
+
+    Parameters:
+    - power: array-like, measured power utilization per hour, or a TimeSeries
+      with a 'measured_power_util' column.
+    - forecast: array-like, forecasted carbon intensity per hour, or a column
+      name when power is a TimeSeries.
+    - shift_window: int, number of hours (including the current one) to look ahead.
+
+    Returns:
+    - ScheduleMoves
+    """
+    power, forecast = _power_and_forecast(power, forecast)
+    num_rows = len(power)
+
+    if shift_window == 0 or num_rows == 0:
+        return _moves_from_destinations(power, np.arange(num_rows))
+
+    dst = _window_argmin(forecast, shift_window, num_rows)
+    return _moves_from_destinations(power, dst)
+
+
+def temporal_shift_power_cap_moves(power, forecast, shift_window, max_peak_power):
+    """
+    Greedy temporal shift with a maximum peak power limit.
+
+    Each hour's load goes to the lowest forecast hour in its window that can
+    take the whole load without exceeding max_peak_power. If no hour in the
+    window has room, the load stays at its original hour.
+
+    Parameters:
+    - power: array-like, measured power utilization per hour, or a TimeSeries
+      with a 'measured_power_util' column.
+    - forecast: array-like, forecasted carbon intensity per hour, or a column
+      name when power is a TimeSeries.
+    - shift_window: int, number of hours (including the current one) to look ahead.
+    - max_peak_power: float, maximum shifted power utilization per hour.
+
+    Returns:
+    - ScheduleMoves
+    """
+    power, forecast = _power_and_forecast(power, forecast)
+    num_rows = len(power)
+    dst = np.arange(num_rows)
+
+    if shift_window == 0:
+        return _moves_from_destinations(power, dst)
+
+    _place_power_cap(power, forecast, np.zeros(num_rows), dst, 0, num_rows, shift_window, max_peak_power)
+    return _moves_from_destinations(power, dst)
+
+
+def score_moves(moves, actuals):
+    """
+    Total emissions of a schedule under one or many actual carbon intensity series.
+
+    The schedule acts as a sparse transfer matrix, so each series costs one dot
+    product with the original trace plus a gather over the moved hours only.
+
+    Parameters:
+    - moves: ScheduleMoves, the schedule to evaluate.
+    - actuals: 1-D array-like or TimeSeries (one series), 2-D array-like or list
+      of TimeSeries with one series per row, or a dict mapping a label to a series.
+
+    Returns:
+    - float for a single series, np.ndarray for a 2-D input, pd.Series for a dict.
+    """
+    if isinstance(actuals, dict):
+        labels = list(actuals)
+        totals = score_moves(moves, np.vstack([_actual_values(actuals[k]) for k in labels]))
+        return pd.Series(totals, index=labels, name='total_carbon_emissions')
+    if isinstance(actuals, (list, tuple)):
+        actuals = np.vstack([_actual_values(actual) for actual in actuals])
+
+    actuals = _as_float(_actual_values(actuals))
+    single = actuals.ndim == 1
+    actuals = np.atleast_2d(actuals)
+    if actuals.shape[1] != moves.num_hours:
+        raise ValueError(f"Expected series of length {moves.num_hours}, got {actuals.shape[1]}")
+
+    # Accumulate in float64 even when the series are stored as float32
+    totals = np.einsum('kn,n->k', actuals, moves.power, dtype=np.float64)
+    totals += (actuals[:, moves.dst] - actuals[:, moves.src]) @ moves.amount
+    return totals[0] if single else totals
@@ -0,0 +1,181 @@
+"""
+Compact array-backed container for regularly spaced power and CI data.
+
+The scripts pass float64 DataFrames around and copy them for every sweep point,
+dragging along unused columns such as 'spci_actual', 'error' and 'daily mape'.
+TimeSeries only stores a start time, a fixed step and one contiguous array per
+column (float32 by default). Slicing and windows are numpy views, so sweeps can
+share a single copy of the data.
+
+Usage:
+    power = TimeSeries.from_csv(power_trace_path, time_column='hour', columns=['measured_power_util'])
+    ci = TimeSeries.from_csv(ci_data_path, columns=['actual', 'predicted'])
+    data = power.join(ci)
+    moves = temporal_shift_moves(data, 'predicted', shift_window=12)
+    total_emissions = score_moves(moves, data)
+"""
+
+import numpy as np
+import pandas as pd
+
+# Column names the schedulers and scorers look up when given a TimeSeries
+POWER_COLUMN = 'measured_power_util'
+ACTUAL_COLUMN = 'actual'
+
+
+class TimeSeries:
+    """
+    Regularly spaced multi-column series.
+
+    Parameters:
+    - start: datetime-like, timestamp of the first row.
+    - step: timedelta-like, spacing between rows.
+    - columns: dict of column name -> 1-D array-like, all of the same length.
+    - dtype: numpy dtype for the arrays, float32 by default. Arrays that already
+      have this dtype and are contiguous are not copied.
+    """
+
+    __slots__ = ('start', 'step', 'columns')
+
+    def __init__(self, start, step, columns, dtype=np.float32):
+        self.start = np.datetime64(pd.Timestamp(start), 'ns')
+        self.step = np.timedelta64(pd.Timedelta(step), 'ns')
+        self.columns = {name: np.ascontiguousarray(values, dtype=dtype) for name, values in columns.items()}
+
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"All columns must have the same length, got {sorted(lengths)}")
+
+    @classmethod
+    def _from_views(cls, start, step, columns):
+        # Build a series around existing arrays without any conversion
+        series = cls.__new__(cls)
+        series.start = start
+        series.step = step
+        series.columns = columns
+        return series
+
+    @classmethod
+    def from_frame(cls, df, time_column='datetime', columns=None, dtype=np.float32):
+        """
+        Build a TimeSeries from a DataFrame with a regularly spaced time column.
+
+        Parameters:
+        - df: pd.DataFrame, sorted by time.
+        - time_column: str, the timestamp column.
+        - columns: list of str, optional, columns to keep (default: all others).
+        - dtype: numpy dtype for the stored arrays.
+        """
+        times = pd.DatetimeIndex(df[time_column])
+        if len(times) < 2:
+            raise ValueError("At least two rows are needed to infer the step")
+        steps = np.diff(times.asi8)
+        if (steps != steps[0]).any():
+            raise ValueError(f"'{time_column}' is not regularly spaced")
+
+        if columns is None:
+            columns = [c for c in df.columns if c != time_column]
+        return cls(times[0], times[1] - times[0], {c: df[c].to_numpy() for c in columns}, dtype=dtype)
+
+    @classmethod
+    def from_csv(cls, path, time_column='datetime', columns=None, dtype=np.float32):
+        """
+        Read only the needed columns of a CSV file into a TimeSeries.
+
+        Parameters:
+        - path: str or Path, input CSV file.
+        - time_column: str, the timestamp column.
+        - columns: list of str, optional, value columns to read (default: all).
+        - dtype: numpy dtype for the stored arrays.
+        """
+        usecols = None if columns is None else [time_column] + list(columns)
+        df = pd.read_csv(path, usecols=usecols, parse_dates=[time_column])
+        return cls.from_frame(df, time_column, columns, dtype=dtype)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def __repr__(self):
+        return (f"TimeSeries(start={self.start}, step={pd.Timedelta(self.step)}, "
+                f"rows={len(self)}, columns={list(self.columns)})")
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, key):
+        """A column array for a name, or a view-backed TimeSeries for a slice."""
+        if isinstance(key, str):
+            return self.columns[key]
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("TimeSeries supports column names and contiguous slices")
+
+        start, _, _ = key.indices(len(self))
+        return self._from_views(self.start + start * self.step, self.step,
+                                {name: values[key] for name, values in self.columns.items()})
+
+    @property
+    def end(self):
+        """Timestamp one step past the last row."""
+        return self.start + len(self) * self.step
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.columns.values())
+
+    def window(self, i, length):
+        """View of rows i .. i + length - 1 (clipped at the end)."""
+        return self[i:i + length]
+
+    def datetimes(self):
+        """Timestamps of all rows."""
+        return self.start + np.arange(len(self)) * self.step
+
+    def position(self, timestamp):
+        """Row position of a timestamp (may be out of range)."""
+        offset = np.datetime64(pd.Timestamp(timestamp), 'ns') - self.start
+        if offset % self.step:
+            raise ValueError(f"{timestamp} is not on the {pd.Timedelta(self.step)} grid")
+        return int(offset // self.step)
+
+    def between(self, start, end):
+        """View of the rows in [start, end)."""
+        first = max(self.position(start), 0)
+        last = min(self.position(end), len(self))
+        return self[first:max(first, last)]
+
+    def select(self, *names):
+        """View with only the given columns."""
+        return self._from_views(self.start, self.step, {name: self.columns[name] for name in names})
+
+    def with_columns(self, **columns):
+        """New series sharing the existing arrays plus extra (or replaced) columns."""
+        extra = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+        if any(len(values) != len(self) for values in extra.values()):
+            raise ValueError("New columns must have the same length as the series")
+        return self._from_views(self.start, self.step, {**self.columns, **extra})
+
+    def join(self, other):
+        """
+        Inner join on time: views of both series over their common range.
+
+        Parameters:
+        - other: TimeSeries with the same step.
+
+        Returns:
+        - TimeSeries with the columns of both series (other wins on name clashes).
+        """
+        if self.step != other.step:
+            raise ValueError("Cannot join series with different steps")
+
+        start = max(self.start, other.start)
+        end = min(self.end, other.end)
+        left, right = self.between(start, end), other.between(start, end)
+        if len(left) != len(right):
+            raise ValueError("Series are not aligned on the same time grid")
+        return self._from_views(start if len(left) else self.start, self.step, {**left.columns, **right.columns})
+
+    def to_frame(self, time_column='datetime'):
+        """Materialize as a DataFrame (copies the data)."""
+        df = pd.DataFrame(self.columns)
+        df.insert(0, time_column, self.datetimes())
+        return df
@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path('..')))
+from carbon_shift.forecast_quality import ForecastQuality
+
+# Rolling MAPE window in hours, optionally given on the command line
+rolling_window = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+
+# Compute the statistics for every SPCI-* region and alpha level in this directory
+quality = ForecastQuality.from_directory(Path('.'), rolling_window=rolling_window)
+
+summary_df = quality.summary()
+print(summary_df.to_string(index=False))
+
+# Save the summary, hour-of-day profiles and rolling MAPE series
+summary_df.to_csv('forecast_quality_summary.csv', index=False)
+quality.hour_of_day_profile().to_csv('forecast_quality_hour_of_day.csv', index=False)
+quality.rolling_mape().to_csv(f'forecast_quality_rolling_mape_{rolling_window}h.csv')
+
+print("Forecast quality results saved to forecast_quality_*.csv")